@@ -3,7 +3,7 @@ from decimal import Decimal
 from django.http import HttpRequest
 from asgiref.sync import sync_to_async
 from TripApp.models import Trip, Participant, Expense, Split, Prepayment
-from TripApp.services.reconciliation import apply_prepayments_to_split, cross_settle_split
+from TripApp.services.reconciliation import reconcile_splits
 from TripApp.services.exchange import get_exchange_rate
 from TripApp.services.breakdown import set_self_breakdown
 from ..settlement.service import recalculate_settlements
@@ -13,7 +13,7 @@ from TripApp.services.delta_builder import (
     build_expense_deleted_notification,
 )
 from TripApp.services.actor_resolver import get_actor_participant_id
-from TripApp.services.broadcast import broadcast_delta
+from TripApp.services.broadcast import broadcast_delta, has_subscribers
 
 
 ZERO = Decimal("0.00")
@@ -132,17 +132,17 @@ async def add_expense(request: HttpRequest, data: dict) -> dict:
     created_splits = await sync_to_async(
         lambda: Split.objects.bulk_create(splits_to_create)
     )()
-    for idx in splits_needing_reconciliation_indices:
-        split = created_splits[idx]
-        await apply_prepayments_to_split(split, trip)
-        await cross_settle_split(split, trip)
+    await reconcile_splits(
+        [created_splits[idx] for idx in splits_needing_reconciliation_indices], trip
+    )
 
     await recalculate_settlements(trip)
 
     # Broadcast delta
-    actor_id = await get_actor_participant_id(request, trip)
-    notification = await build_expense_added_notification(trip, actor_id)
-    await broadcast_delta(trip.trip_id, notification)
+    if has_subscribers(trip.trip_id):
+        actor_id = await get_actor_participant_id(request, trip)
+        notification = await build_expense_added_notification(trip, actor_id)
+        await broadcast_delta(trip.trip_id, notification)
 
     return {"success": True, "message": "Expense added successfully."}
 
@@ -342,18 +342,18 @@ async def update_expense(request: HttpRequest, data: dict) -> dict:
     )()
 
     # Step 6: Auto-reconcile
-    for idx in splits_needing_reconciliation_indices:
-        split = created_splits[idx]
-        await apply_prepayments_to_split(split, trip)
-        await cross_settle_split(split, trip)
+    await reconcile_splits(
+        [created_splits[idx] for idx in splits_needing_reconciliation_indices], trip
+    )
 
     # Step 7: Recalculate settlements
     await recalculate_settlements(trip)
 
     # Broadcast delta
-    actor_id = await get_actor_participant_id(request, trip)
-    notification = await build_expense_updated_notification(trip, actor_id)
-    await broadcast_delta(trip.trip_id, notification)
+    if has_subscribers(trip.trip_id):
+        actor_id = await get_actor_participant_id(request, trip)
+        notification = await build_expense_updated_notification(trip, actor_id)
+        await broadcast_delta(trip.trip_id, notification)
 
     return {"success": True, "message": "Expense updated successfully."}
 
@@ -405,8 +405,9 @@ async def delete_expense(request: HttpRequest, trip_id: int, expense_id: int) ->
     await recalculate_settlements(trip)
 
     # Broadcast delta
-    actor_id = await get_actor_participant_id(request, trip)
-    notification = await build_expense_deleted_notification(trip, actor_id)
-    await broadcast_delta(trip.trip_id, notification)
+    if has_subscribers(trip.trip_id):
+        actor_id = await get_actor_participant_id(request, trip)
+        notification = await build_expense_deleted_notification(trip, actor_id)
+        await broadcast_delta(trip.trip_id, notification)
 
     return {"success": True, "message": "Expense deleted successfully."}
\ No newline at end of file
@@ -8,7 +8,7 @@ from TripApp.services.delta_builder import (
     build_participant_updated_notification,
     build_participant_removed_notification,
 )
-from TripApp.services.broadcast import broadcast_delta
+from TripApp.services.broadcast import broadcast_delta, has_subscribers
 from TripApp.services.actor_resolver import get_actor_participant_id
 
 def _generate_access_code() -> str:
@@ -64,9 +64,10 @@ async def add_placeholder(request: HttpRequest, trip_id: int, nickname: str) ->
     )
 
     # Broadcast delta
-    actor_id = await get_actor_participant_id(request, trip)
-    notification = await build_participant_added_notification(trip, actor_id)
-    await broadcast_delta(trip.trip_id, notification)
+    if has_subscribers(trip.trip_id):
+        actor_id = await get_actor_participant_id(request, trip)
+        notification = await build_participant_added_notification(trip, actor_id)
+        await broadcast_delta(trip.trip_id, notification)
 
     return {"success": True, "message": "Placeholder added."}
 
@@ -92,9 +93,10 @@ async def detach_user(request: HttpRequest, trip_id: int, participant_id: int) -
     await sync_to_async(participant.save)()
 
     # Broadcast delta
-    actor_id = await get_actor_participant_id(request, trip)
-    notification = await build_participant_updated_notification(trip, actor_id)
-    await broadcast_delta(trip.trip_id, notification)
+    if has_subscribers(trip.trip_id):
+        actor_id = await get_actor_participant_id(request, trip)
+        notification = await build_participant_updated_notification(trip, actor_id)
+        await broadcast_delta(trip.trip_id, notification)
 
     return {"success": True, "message": "User detached. New access code generated."}
 
@@ -115,9 +117,10 @@ async def remove_placeholder(request: HttpRequest, trip_id: int, participant_id:
     await sync_to_async(participant.delete)()
 
     # Broadcast delta
-    actor_id = await get_actor_participant_id(request, trip)
-    notification = await build_participant_removed_notification(trip, actor_id)
-    await broadcast_delta(trip.trip_id, notification)
+    if has_subscribers(trip.trip_id):
+        actor_id = await get_actor_participant_id(request, trip)
+        notification = await build_participant_removed_notification(trip, actor_id)
+        await broadcast_delta(trip.trip_id, notification)
 
     return {"success": True, "message": "Placeholder removed."}
 
@@ -151,7 +154,8 @@ async def join_trip(request: HttpRequest, access_code: str) -> dict:
     await sync_to_async(participant.save)()
 
     # Broadcast delta
-    notification = await build_participant_updated_notification(trip, participant.participant_id)
-    await broadcast_delta(trip.trip_id, notification)
+    if has_subscribers(trip.trip_id):
+        notification = await build_participant_updated_notification(trip, participant.participant_id)
+        await broadcast_delta(trip.trip_id, notification)
 
     return {"success": True, "message": "Joined trip successfully."}
\ No newline at end of file
@@ -6,7 +6,7 @@ from TripApp.services.reconciliation import apply_prepayment_to_splits
 from ..settlement.service import recalculate_settlements
 from TripApp.services.delta_builder import build_prepayment_notification
 from TripApp.services.actor_resolver import get_actor_participant_id
-from TripApp.services.broadcast import broadcast_delta
+from TripApp.services.broadcast import broadcast_delta, has_subscribers
 from TripApp.services.exchange import get_exchange_rate
 
 VALID_DIRECTIONS = {"TO_ME", "FROM_ME"}
@@ -73,7 +73,7 @@ async def add_prepayment(
         has_expenses_in_currency = await sync_to_async(
             lambda: Trip.objects.filter(
                 trip_id=trip_id,
-                expense__expense_currency__iexact=currency,
+                expense__expense_currency=currency,
             ).exists()
         )()
         if not has_expenses_in_currency:
@@ -100,9 +100,10 @@ async def add_prepayment(
     await recalculate_settlements(trip)
 
     # Broadcast delta
-    actor_id = await get_actor_participant_id(request, trip)
-    target_id = other_participant.participant_id
-    notification = await build_prepayment_notification(trip, actor_id, target_id)
-    await broadcast_delta(trip.trip_id, notification)
+    if has_subscribers(trip.trip_id):
+        actor_id = await get_actor_participant_id(request, trip)
+        target_id = other_participant.participant_id
+        notification = await build_prepayment_notification(trip, actor_id, target_id)
+        await broadcast_delta(trip.trip_id, notification)
 
     return {"success": True, "message": "Prepayment added and reconciled."}
\ No newline at end of file
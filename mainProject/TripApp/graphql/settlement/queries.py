@@ -21,7 +21,7 @@ class SettlementQuery:
         for backward compatibility with the existing GraphQL schema.
         """
         trip = await sync_to_async(Trip.objects.get)(trip_id=trip_id)
-        trip_currency = trip.default_currency.upper()
+        trip_currency = trip.default_currency
 
         relations = await sync_to_async(
             lambda: list(
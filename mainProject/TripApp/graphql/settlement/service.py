@@ -8,13 +8,17 @@ Settlement service:
 
 from collections import defaultdict
 from decimal import Decimal
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.http import HttpRequest
 from asgiref.sync import sync_to_async
 
 from TripApp.services.actor_resolver import get_actor_participant_id
-from TripApp.services.broadcast import broadcast_delta
-from TripApp.services.delta_builder import build_settlement_changed_notification
+from TripApp.services.broadcast import broadcast_delta, broadcast_deltas, has_subscribers
+from TripApp.services.delta_builder import (
+    build_settlement_changed_notification,
+    build_settlement_changed_notifications,
+)
 from TripApp.services.settlement_history import log_settlement
 from TripApp.services.breakdown import append_breakdown
 from TripApp.models import (
@@ -34,40 +38,83 @@ def _ordered_pair(id_a: int, id_b: int) -> tuple[int, int]:
 # Recalculate settlements → rebuild ParticipantRelation
 # ---------------------------------------------------------------------------
 
+def _load_recalculation_rows(trip: Trip) -> tuple[list, list]:
+    """Splits and prepayments of a trip, with only the columns the rebuild reads."""
+    # Expense currency and payer are annotated onto each split, so no
+    # Expense/Participant objects are built. Currencies are stored upper-cased.
+    splits = list(
+        Split.objects.filter(expense__trip=trip)
+        .annotate(
+            expense_currency=F("expense__expense_currency"),
+            payer_id=F("expense__payer_id"),
+        )
+        .only(
+            "participant_id",
+            "amount_in_cost_currency",
+            "amount_in_trip_currency",
+            "left_to_settlement_amount_in_cost_currency",
+            "left_to_settlement_amount_in_trip_currency",
+        )
+    )
+    prepayments = list(
+        Prepayment.objects.filter(trip=trip)
+        .only(
+            "from_participant_id",
+            "to_participant_id",
+            "amount",
+            "amount_left",
+            "currency",
+            "rate",
+            "created_date",
+        )
+        .order_by("created_date")
+    )
+    return splits, prepayments
+
+
+def _replace_relations(trip: Trip, relations: list[ParticipantRelation]) -> None:
+    """Swap a trip's ParticipantRelation rows atomically."""
+    with transaction.atomic():
+        ParticipantRelation.objects.filter(trip=trip).delete()
+        if relations:
+            ParticipantRelation.objects.bulk_create(relations)
+
+
 async def recalculate_settlements(trip: Trip) -> None:
     """
     Rebuild all ParticipantRelation records for a trip from scratch.
     """
-    trip_currency = trip.default_currency.upper()
+    # The rebuild is pure DB + arithmetic work with no concurrency to gain
+    # from, so it runs as one sync function behind a single thread hop.
+    await sync_to_async(_recalculate_settlements)(trip)
 
-    splits = await sync_to_async(
-        lambda: list(
-            Split.objects.filter(expense__trip=trip)
-            .select_related("expense", "participant")
-        )
-    )()
 
-    prepayments = await sync_to_async(
-        lambda: list(
-            Prepayment.objects.filter(trip=trip)
-            .select_related("from_participant", "to_participant")
-            .order_by("created_date")
-        )
-    )()
+def _recalculate_settlements(trip: Trip) -> None:
+    trip_currency = trip.default_currency
+
+    splits, prepayments = _load_recalculation_rows(trip)
+
+    if not splits and not prepayments:
+        # Nothing to relate (e.g. a new trip): only clear stale relations
+        _replace_relations(trip, [])
+        return
 
     pairs: set[tuple[int, int]] = set()
 
-    left_trip: dict[tuple[int, int], Decimal] = defaultdict(lambda: ZERO)
-    left_other: dict[tuple[int, int, str], Decimal] = defaultdict(lambda: ZERO)
-    all_trip: dict[tuple[int, int], Decimal] = defaultdict(lambda: ZERO)
-    all_other: dict[tuple[int, int, str], Decimal] = defaultdict(lambda: ZERO)
-    prep_amount_left: dict[tuple[int, int, str], Decimal] = defaultdict(lambda: ZERO)
+    # Per-currency totals are nested under their pair, so building a relation
+    # reads only its own entries instead of rescanning every pair's totals.
+    left_trip: dict[tuple[int, int], Decimal] = defaultdict(Decimal)
+    left_other: dict[tuple[int, int], dict[str, Decimal]] = defaultdict(lambda: defaultdict(Decimal))
+    all_trip: dict[tuple[int, int], Decimal] = defaultdict(Decimal)
+    all_other: dict[tuple[int, int], dict[str, Decimal]] = defaultdict(lambda: defaultdict(Decimal))
+    prep_amount_left: dict[tuple[int, int], dict[str, Decimal]] = defaultdict(lambda: defaultdict(Decimal))
     prep_history: dict[tuple[int, int], list] = defaultdict(list)
 
-    # Process splits
+    # Process splits. Signs are applied by negating, not by Decimal multiplies:
+    # a split counts positive when its debtor is the pair's B side.
     for split in splits:
         from_id = split.participant_id
-        to_id = split.expense.payer_id
+        to_id = split.payer_id
 
         if from_id == to_id:
             continue
@@ -75,32 +122,27 @@ async def recalculate_settlements(trip: Trip) -> None:
         pair = _ordered_pair(from_id, to_id)
         pairs.add(pair)
 
-        sign = Decimal("1") if from_id == pair[1] else Decimal("-1")
-        expense_currency = split.expense.expense_currency.upper()
+        positive = from_id == pair[1]
+        expense_currency = split.expense_currency
+        # Trip-currency expenses have no separate cost amount to report
+        same_currency = expense_currency == trip_currency
 
-        all_trip[pair] += sign * split.amount_in_trip_currency
-        if expense_currency == trip_currency:
-            all_other[(pair[0], pair[1], trip_currency)] += sign * split.amount_in_trip_currency
-        else:
-            all_other[(pair[0], pair[1], expense_currency)] += sign * split.amount_in_cost_currency
+        trip_amt = split.amount_in_trip_currency
+        other_amt = trip_amt if same_currency else split.amount_in_cost_currency
+        all_trip[pair] += trip_amt if positive else -trip_amt
+        all_other[pair][expense_currency] += other_amt if positive else -other_amt
 
         left_trip_amt = split.left_to_settlement_amount_in_trip_currency
-        left_cost_amt = split.left_to_settlement_amount_in_cost_currency
-
-        if left_trip_amt <= ZERO and left_cost_amt <= ZERO:
-            continue
-
         if left_trip_amt > ZERO:
-            left_trip[pair] += sign * left_trip_amt
+            left_trip[pair] += left_trip_amt if positive else -left_trip_amt
 
-        if expense_currency == trip_currency:
-            if left_trip_amt > ZERO:
-                left_other[(pair[0], pair[1], trip_currency)] += sign * left_trip_amt
-        else:
-            if left_cost_amt > ZERO:
-                left_other[(pair[0], pair[1], expense_currency)] += sign * left_cost_amt
+        left_other_amt = (
+            left_trip_amt if same_currency else split.left_to_settlement_amount_in_cost_currency
+        )
+        if left_other_amt > ZERO:
+            left_other[pair][expense_currency] += left_other_amt if positive else -left_other_amt
 
-    # Process prepayments
+    # Process prepayments; they count positive when paid by the pair's A side
     for prep in prepayments:
         from_id = prep.from_participant_id
         to_id = prep.to_participant_id
@@ -111,41 +153,32 @@ async def recalculate_settlements(trip: Trip) -> None:
         pair = _ordered_pair(from_id, to_id)
         pairs.add(pair)
 
-        prep_currency = prep.currency.upper()
-        sign_all = Decimal("-1") if from_id == pair[1] else Decimal("1")
+        positive = from_id == pair[0]
+        prep_currency = prep.currency
+        amount = prep.amount
 
-        prep_amount_in_trip = (prep.amount * prep.rate).quantize(Decimal("0.01"))
+        amount_in_trip = (amount * prep.rate).quantize(Decimal("0.01"))
+        all_trip[pair] += amount_in_trip if positive else -amount_in_trip
+        all_other[pair][prep_currency] += amount if positive else -amount
 
-        all_trip[pair] += sign_all * prep_amount_in_trip
-        if prep_currency == trip_currency:
-            all_other[(pair[0], pair[1], trip_currency)] += sign_all * prep.amount
-        else:
-            all_other[(pair[0], pair[1], prep_currency)] += sign_all * prep.amount
-
-        if prep.amount_left > ZERO:
-            left_in_trip = (prep.amount_left * prep.rate).quantize(Decimal("0.01"))
-            left_trip[pair] += sign_all * left_in_trip
-            if prep_currency == trip_currency:
-                left_other[(pair[0], pair[1], trip_currency)] += sign_all * prep.amount_left
-            else:
-                left_other[(pair[0], pair[1], prep_currency)] += sign_all * prep.amount_left
-
-        if prep.amount_left > ZERO:
-            sign_prep = Decimal("1") if from_id == pair[0] else Decimal("-1")
-            prep_amount_left[(pair[0], pair[1], prep_currency)] += sign_prep * prep.amount_left
+        amount_left = prep.amount_left
+        if amount_left > ZERO:
+            left_in_trip = (amount_left * prep.rate).quantize(Decimal("0.01"))
+            signed_left = amount_left if positive else -amount_left
+            left_trip[pair] += left_in_trip if positive else -left_in_trip
+            left_other[pair][prep_currency] += signed_left
+            prep_amount_left[pair][prep_currency] += signed_left
 
-        sign_hist = 1.0 if from_id == pair[0] else -1.0
+        amount_f = float(amount)
         prep_history[pair].append({
             "date": prep.created_date.timestamp() * 1000,
             "values": {
                 "is_main_currency": prep_currency == trip_currency,
                 "currency": prep_currency,
-                "amount": float(prep.amount) * sign_hist,
+                "amount": amount_f if positive else -amount_f,
             },
         })
 
-    await sync_to_async(ParticipantRelation.objects.filter(trip=trip).delete)()
-
     relations_to_create = []
     for pair in pairs:
         a_id, b_id = pair
@@ -157,8 +190,8 @@ async def recalculate_settlements(trip: Trip) -> None:
             "currency": trip_currency,
             "amount": float(lft.quantize(Decimal("0.01"))),
         })
-        for (pa, pb, curr), amt in left_other.items():
-            if (pa, pb) == pair and curr != trip_currency:
+        for curr, amt in left_other.get(pair, {}).items():
+            if curr != trip_currency:
                 left_for_settled_json.append({
                     "is_main_currency": False,
                     "currency": curr,
@@ -172,8 +205,8 @@ async def recalculate_settlements(trip: Trip) -> None:
             "currency": trip_currency,
             "amount": float(art.quantize(Decimal("0.01"))),
         })
-        for (pa, pb, curr), amt in all_other.items():
-            if (pa, pb) == pair and curr != trip_currency:
+        for curr, amt in all_other.get(pair, {}).items():
+            if curr != trip_currency:
                 all_related_json.append({
                     "is_main_currency": False,
                     "currency": curr,
@@ -181,13 +214,12 @@ async def recalculate_settlements(trip: Trip) -> None:
                 })
 
         amount_left_json = []
-        for (pa, pb, curr), amt in prep_amount_left.items():
-            if (pa, pb) == pair:
-                amount_left_json.append({
-                    "is_main_currency": curr == trip_currency,
-                    "currency": curr,
-                    "amount": float(amt.quantize(Decimal("0.01"))),
-                })
+        for curr, amt in prep_amount_left.get(pair, {}).items():
+            amount_left_json.append({
+                "is_main_currency": curr == trip_currency,
+                "currency": curr,
+                "amount": float(amt.quantize(Decimal("0.01"))),
+            })
 
         history_json = prep_history.get(pair, [])
 
@@ -205,10 +237,7 @@ async def recalculate_settlements(trip: Trip) -> None:
             prepayment_details=prepayment_details_json,
         ))
 
-    if relations_to_create:
-        await sync_to_async(
-            lambda: ParticipantRelation.objects.bulk_create(relations_to_create)
-        )()
+    _replace_relations(trip, relations_to_create)
 
 
 # ---------------------------------------------------------------------------
@@ -421,13 +450,14 @@ async def settle_by_amount(
 
     settled_amount = amount_dec - remaining
 
-    if actor_id == from_participant.participant_id:
-        target_id = to_participant.participant_id
-    else:
-        target_id = from_participant.participant_id
+    if has_subscribers(trip.trip_id):
+        if actor_id == from_participant.participant_id:
+            target_id = to_participant.participant_id
+        else:
+            target_id = from_participant.participant_id
 
-    notification = await build_settlement_changed_notification(trip, actor_id, target_id)
-    await broadcast_delta(trip.trip_id, notification)
+        notification = await build_settlement_changed_notification(trip, actor_id, target_id)
+        await broadcast_delta(trip.trip_id, notification)
 
     return {
         "success": True,
@@ -471,7 +501,7 @@ async def _load_settleable_splits(
     ).select_related("expense").order_by("expense__created_at")
 
     if not is_main_currency:
-        base_qs = base_qs.filter(expense__expense_currency__iexact=currency)
+        base_qs = base_qs.filter(expense__expense_currency=currency)
 
     if is_main_currency:
         base_qs = base_qs.filter(left_to_settlement_amount_in_trip_currency__gt=ZERO)
@@ -498,7 +528,7 @@ async def _load_settleable_prepayments(
                 from_participant_id=to_participant.participant_id,
                 to_participant_id=from_participant.participant_id,
                 amount_left__gt=ZERO,
-                currency__iexact=prep_currency,
+                currency=prep_currency,
             ).order_by("created_date")
         )
     )()
@@ -607,7 +637,7 @@ async def settle_by_prepayment(
                 from_participant_id=from_participant.participant_id,
                 to_participant_id=to_participant.participant_id,
                 amount_left__gt=ZERO,
-                currency__iexact=prep_currency,
+                currency=prep_currency,
             ).order_by("created_date")
         )
     )()
@@ -658,20 +688,21 @@ async def settle_by_prepayment(
 
     settled_amount = amount_dec - remaining
 
-    if actor_id == from_participant.participant_id:
-        target_id = to_participant.participant_id
-    else:
-        target_id = from_participant.participant_id
-
-    notification = {
-        "trip_id": trip.trip_id,
-        "trip_name": trip.title,
-        "event_type": "SETTLEMENT_CHANGED",
-        "actor_nickname": caller_participant.nickname,
-        "actor_participant_id": actor_id,
-        "target_participant_id": target_id,
-    }
-    await broadcast_delta(trip.trip_id, notification)
+    if has_subscribers(trip.trip_id):
+        if actor_id == from_participant.participant_id:
+            target_id = to_participant.participant_id
+        else:
+            target_id = from_participant.participant_id
+
+        notification = {
+            "trip_id": trip.trip_id,
+            "trip_name": trip.title,
+            "event_type": "SETTLEMENT_CHANGED",
+            "actor_nickname": caller_participant.nickname,
+            "actor_participant_id": actor_id,
+            "target_participant_id": target_id,
+        }
+        await broadcast_delta(trip.trip_id, notification)
 
     return {
         "success": True,
@@ -825,19 +856,19 @@ async def settle_by_costs(
 
     await recalculate_settlements(trip)
 
-    other_ids = set()
-    for item in items:
-        expense = expenses_map[item["expense_id"]]
-        payer_id = expense.payer_id
-        participant_id = item["participant_id"]
-        if actor_id == payer_id:
-            other_ids.add(participant_id)
-        else:
-            other_ids.add(payer_id)
+    if has_subscribers(trip.trip_id):
+        other_ids = set()
+        for item in items:
+            expense = expenses_map[item["expense_id"]]
+            payer_id = expense.payer_id
+            participant_id = item["participant_id"]
+            if actor_id == payer_id:
+                other_ids.add(participant_id)
+            else:
+                other_ids.add(payer_id)
 
-    for target_id in other_ids:
-        notification = await build_settlement_changed_notification(trip, actor_id, target_id)
-        await broadcast_delta(trip.trip_id, notification)
+        notifications = await build_settlement_changed_notifications(trip, actor_id, other_ids)
+        await broadcast_deltas(trip.trip_id, notifications)
 
     return {
         "success": True,
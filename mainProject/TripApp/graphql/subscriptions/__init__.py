@@ -5,10 +5,15 @@ from typing import AsyncGenerator
 from channels.layers import get_channel_layer
 from asgiref.sync import sync_to_async
 from TripApp.models import Participant
+from TripApp.services.broadcast import register_subscriber, unregister_subscriber
 from .types import TripNotification, TripEventType
 
 logger = logging.getLogger(__name__)
 
+# event_type value → enum member, resolved once instead of per delivered message
+_EVENT_MAP: dict[str, TripEventType] = {e.value: e for e in TripEventType}
+
+
 @strawberry.type
 class Subscription:
 
@@ -54,6 +59,7 @@ class Subscription:
         group_name = f"trip_{trip_id}"
 
         await channel_layer.group_add(group_name, channel_name)
+        register_subscriber(trip_id)
         logger.info(f"Subscription started: trip={trip_id}, participant={my_participant_id}, channel={channel_name}")
 
         try:
@@ -66,11 +72,17 @@ class Subscription:
                 except asyncio.TimeoutError:
                     continue
 
-                if message["type"] == "trip.delta":
-                    payload = message["payload"]
+                message_type = message["type"]
+                if message_type == "trip.delta":
+                    payloads = (message["payload"],)
+                elif message_type == "trip.delta.batch":
+                    payloads = message["payloads"]
+                else:
+                    continue
 
+                for payload in payloads:
                     # Skip notifications from the actor themselves
-                    if payload.get("actor_participant_id") == my_participant_id:
+                    if payload["actor_participant_id"] == my_participant_id:
                         continue
 
                     # If targeted — only deliver to target participant
@@ -81,7 +93,7 @@ class Subscription:
                     notification = TripNotification(
                         trip_id=payload["trip_id"],
                         trip_name=payload["trip_name"],
-                        event_type=TripEventType(payload["event_type"]),
+                        event_type=_EVENT_MAP[payload["event_type"]],
                         actor_nickname=payload["actor_nickname"],
                         actor_participant_id=payload["actor_participant_id"],
                     )
@@ -92,5 +104,6 @@ class Subscription:
         except Exception as e:
             logger.warning(f"Subscription error: trip={trip_id}, {type(e).__name__}: {e}")
         finally:
+            unregister_subscriber(trip_id)
             await channel_layer.group_discard(group_name, channel_name)
             logger.info(f"Subscription cleaned up: trip={trip_id}, channel={channel_name}")
\ No newline at end of file
@@ -1,3 +1,5 @@
+from collections.abc import Iterable
+from operator import itemgetter
 import strawberry
 from strawberry.types import Info
 from .types import (
@@ -13,16 +15,20 @@ from ..utils import get_request
 from . import service
 
 
+_money_fields = itemgetter("is_main_currency", "currency", "amount")
+
+
 def _to_money(d: dict) -> SimpleMoneyValueType:
+    is_main_currency, currency, amount = _money_fields(d)
     return SimpleMoneyValueType(
-        is_main_currency=d["is_main_currency"],
-        currency=d["currency"],
-        amount=d["amount"],
+        is_main_currency=is_main_currency,
+        currency=currency,
+        amount=amount,
     )
 
 
 def _to_money_list(lst: list[dict]) -> list[SimpleMoneyValueType]:
-    return [_to_money(d) for d in lst]
+    return list(map(_to_money, lst))
 
 
 def _to_breakdown_entry(d: dict) -> SettlementBreakdownEntryType:
@@ -53,6 +59,90 @@ def _to_settlement_history(lst: list[dict]) -> list[SettlementHistoryType]:
     ]
 
 
+def _to_categories(lst: list[dict]) -> list[CategoryType]:
+    return [
+        CategoryType(category_id=c["category_id"], total_amount=c["total_amount"])
+        for c in lst
+    ]
+
+
+def _to_share(s: dict) -> ShareType:
+    return ShareType(
+        participant_id=s["participant_id"],
+        participant_nickname=s["participant_nickname"],
+        split_value=_to_money_list(s["split_value"]),
+        is_settlement=s["is_settlement"],
+        left_for_settlement=_to_money_list(s["left_for_settlement"]),
+        settlement_breakdown=_to_breakdown_list(s["settlement_breakdown"]),
+    )
+
+
+def _to_expenses(lst: Iterable[dict]) -> list[ExpenseDetailType]:
+    return [
+        ExpenseDetailType(
+            id=e["id"],
+            name=e["name"],
+            description=e["description"],
+            total_expense=_to_money_list(e["total_expense"]),
+            amount=e["amount"],
+            currency=e["currency"],
+            date=e["date"],
+            category_id=e["category_id"],
+            payer_id=e["payer_id"],
+            payer_nickname=e["payer_nickname"],
+            shared_with=[_to_share(s) for s in e["shared_with"]],
+        )
+        for e in lst
+    ]
+
+
+def _to_participants(lst: Iterable[dict]) -> list[ParticipantDetailType]:
+    return [
+        ParticipantDetailType(
+            id=p["id"],
+            nickname=p["nickname"],
+            total_expenses=_to_money_list(p["total_expenses"]),
+            is_owner=p["is_owner"],
+            is_placeholder=p["is_placeholder"],
+            access_code=p["access_code"],
+            is_active=p["is_active"],
+        )
+        for p in lst
+    ]
+
+
+def _to_prepayment_details(d: dict) -> PrepaymentDetailsType:
+    return PrepaymentDetailsType(
+        amount_left=_to_money_list(d["amount_left"]),
+        history=[
+            PrepaymentHistoryType(date=h["date"], values=_to_money(h["values"]))
+            for h in d["history"]
+        ],
+    )
+
+
+def _to_settlement(settlement_data: dict | None) -> SettlementType | None:
+    """Settlement (with history per relation); None when there are no relations."""
+    if not settlement_data or not settlement_data.get("relations"):
+        return None
+
+    return SettlementType(
+        relations=[
+            SettlementRelationType(
+                related_id=r["related_id"],
+                related_name=r["related_name"],
+                left_for_settled=_to_money_list(r["left_for_settled"]),
+                all_related_amount=_to_money_list(r["all_related_amount"]),
+                prepayment=_to_prepayment_details(r["prepayment"]),
+                settlement_history=_to_settlement_history(
+                    r.get("settlement_history", [])
+                ),
+            )
+            for r in settlement_data["relations"]
+        ]
+    )
+
+
 @strawberry.type
 class TripQuery:
 
@@ -82,83 +172,6 @@ class TripQuery:
         if data is None:
             raise PermissionError("You are not a participant in this trip.")
 
-        # Categories
-        categories = [
-            CategoryType(category_id=c["category_id"], total_amount=c["total_amount"])
-            for c in data["categories"]
-        ]
-
-        # Expenses
-        expenses = [
-            ExpenseDetailType(
-                id=e["id"],
-                name=e["name"],
-                description=e["description"],
-                total_expense=_to_money_list(e["total_expense"]),
-                amount=e["amount"],
-                currency=e["currency"],
-                date=e["date"],
-                category_id=e["category_id"],
-                payer_id=e["payer_id"],
-                payer_nickname=e["payer_nickname"],
-                shared_with=[
-                    ShareType(
-                        participant_id=s["participant_id"],
-                        participant_nickname=s["participant_nickname"],
-                        split_value=_to_money_list(s["split_value"]),
-                        is_settlement=s["is_settlement"],
-                        left_for_settlement=_to_money_list(s["left_for_settlement"]),
-                        settlement_breakdown=_to_breakdown_list(s["settlement_breakdown"]),
-                    )
-                    for s in e["shared_with"]
-                ],
-            )
-            for e in data["expenses"]
-        ]
-
-        # Participants
-        participants = [
-            ParticipantDetailType(
-                id=p["id"],
-                nickname=p["nickname"],
-                total_expenses=_to_money_list(p["total_expenses"]),
-                is_owner=p["is_owner"],
-                is_placeholder=p["is_placeholder"],
-                access_code=p["access_code"],
-                is_active=p["is_active"],
-            )
-            for p in data["participants"]
-        ]
-
-        # Settlement (with history per relation)
-        settlement_data = data.get("settlement")
-        settlement = None
-        if settlement_data and settlement_data.get("relations"):
-            settlement = SettlementType(
-                relations=[
-                    SettlementRelationType(
-                        related_id=r["related_id"],
-                        related_name=r["related_name"],
-                        left_for_settled=_to_money_list(r["left_for_settled"]),
-                        all_related_amount=_to_money_list(r["all_related_amount"]),
-                        prepayment=PrepaymentDetailsType(
-                            amount_left=_to_money_list(r["prepayment"]["amount_left"]),
-                            history=[
-                                PrepaymentHistoryType(
-                                    date=h["date"],
-                                    values=_to_money(h["values"]),
-                                )
-                                for h in r["prepayment"]["history"]
-                            ],
-                        ),
-                        settlement_history=_to_settlement_history(
-                            r.get("settlement_history", [])
-                        ),
-                    )
-                    for r in settlement_data["relations"]
-                ]
-            )
-
         return TripDetailType(
             id=data["id"],
             title=data["title"],
@@ -167,12 +180,12 @@ class TripQuery:
             currency=data["currency"],
             description=data["description"],
             total_expenses=data["total_expenses"],
-            categories=categories,
+            categories=_to_categories(data["categories"]),
             owner_id=data["owner_id"],
             im_owner=data["im_owner"],
             my_participant_id=data["my_participant_id"],
             my_cost=_to_money_list(data["my_cost"]),
-            expenses=expenses,
-            participants=participants,
-            settlement=settlement,
+            expenses=_to_expenses(data["expenses"]),
+            participants=_to_participants(data["participants"]),
+            settlement=_to_settlement(data.get("settlement")),
         )
\ No newline at end of file
@@ -3,9 +3,14 @@ Trip query service — builds TripListDto and TripDetailDto for the frontend.
 """
 
 from collections import defaultdict
+from collections.abc import Iterator
 from datetime import datetime, timezone
 from decimal import Decimal
-from django.db.models import Sum, Q
+from itertools import groupby
+from operator import itemgetter
+from django.db import transaction
+from django.db.models import F, Prefetch, Q, Sum
+from django.db.models.functions import Coalesce
 from django.http import HttpRequest
 from asgiref.sync import sync_to_async
 from TripApp.models import (
@@ -16,6 +21,18 @@ from TripApp.services.breakdown import get_full_breakdown
 
 ZERO = Decimal("0.00")
 
+_SPLIT_FIELDS = (
+    "participant_id",
+    "expense_id",
+    "expense__expense_currency",
+    "is_settlement",
+    "amount_in_cost_currency",
+    "amount_in_trip_currency",
+    "left_to_settlement_amount_in_cost_currency",
+    "left_to_settlement_amount_in_trip_currency",
+    "settlement_breakdown",
+)
+
 
 # ---------------------------------------------------------------------------
 # Trip List (lightweight)
@@ -25,51 +42,31 @@ async def get_trip_list(request: HttpRequest) -> list[dict]:
     """Return lightweight list of trips the user participates in."""
     user = await sync_to_async(lambda: request.user)()
 
+    # Expense totals are summed in SQL and the owner's participant row is
+    # prefetched, so the whole list costs two queries regardless of trip count.
     participants = await sync_to_async(
         lambda: list(
             Participant.objects.filter(user=user)
-            .select_related("trip", "trip__trip_owner")
-        )
-    )()
-
-    if not participants:
-        return []
-
-    trip_ids = [p.trip.trip_id for p in participants]
-    expense_totals = await sync_to_async(
-        lambda: dict(
-            Expense.objects.filter(trip_id__in=trip_ids)
-            .values_list("trip_id")
-            .annotate(total=Sum("amount_in_trip_currency"))
-            .values_list("trip_id", "total")
-        )
-    )()
-    owner_participants = await sync_to_async(
-        lambda: {
-            p.trip_id: p
-            for p in Participant.objects.filter(
-                trip_id__in=trip_ids,
-                user_id__in=[p.trip.trip_owner_id for p in participants]
-            ).filter()
-        }
-    )()
-
-    trip_owner_map = {p.trip.trip_id: p.trip.trip_owner_id for p in participants}
-    owner_participants_list = await sync_to_async(
-        lambda: list(
-            Participant.objects.filter(trip_id__in=trip_ids, is_placeholder=False)
-            .only("participant_id", "trip_id", "user_id")
+            .select_related("trip")
+            .annotate(
+                total_expenses=Coalesce(Sum("trip__expense__amount_in_trip_currency"), ZERO)
+            )
+            .prefetch_related(
+                Prefetch(
+                    "trip__participant_set",
+                    queryset=Participant.objects.filter(
+                        user_id=F("trip__trip_owner_id")
+                    ).only("participant_id", "trip_id"),
+                    to_attr="owner_participants",
+                )
+            )
         )
     )()
-    owner_participant_map = {}
-    for op in owner_participants_list:
-        if op.user_id == trip_owner_map.get(op.trip_id):
-            owner_participant_map[op.trip_id] = op.participant_id
 
     trips = []
     for p in participants:
         trip = p.trip
-        total = expense_totals.get(trip.trip_id, Decimal("0"))
+        owner_participants = trip.owner_participants
 
         trips.append({
             "id": trip.trip_id,
@@ -78,8 +75,8 @@ async def get_trip_list(request: HttpRequest) -> list[dict]:
             "date_end": trip.end_date.timestamp() * 1000,
             "currency": trip.default_currency,
             "description": trip.description,
-            "total_expenses": float(total or 0),
-            "owner_id": owner_participant_map.get(trip.trip_id),
+            "total_expenses": float(p.total_expenses),
+            "owner_id": owner_participants[0].participant_id if owner_participants else None,
             "im_owner": p.user_id == trip.trip_owner_id,
         })
 
@@ -93,91 +90,74 @@ async def get_trip_list(request: HttpRequest) -> list[dict]:
 async def get_trip_details(request: HttpRequest, trip_id: int) -> dict:
     """Return full trip data matching TripDto on FE."""
     user = await sync_to_async(lambda: request.user)()
-    trip = await sync_to_async(Trip.objects.get)(trip_id=trip_id)
-    trip_currency = trip.default_currency.upper()
 
+    # Membership check and trip row in one query; the trip is never loaded
+    # for callers who are not participants.
     my_participant = await sync_to_async(
-        lambda: Participant.objects.filter(trip=trip, user=user).first()
+        lambda: Participant.objects.filter(trip_id=trip_id, user=user)
+        .select_related("trip")
+        .first()
     )()
     if not my_participant:
         return None
 
+    trip = my_participant.trip
+    trip_currency = trip.default_currency
     my_id = my_participant.participant_id
 
-    # --- Load all data upfront ---
-    all_participants = await sync_to_async(
-        lambda: list(Participant.objects.filter(trip=trip).select_related("user"))
-    )()
+    # --- Load all data upfront (one snapshot) ---
+    (
+        all_participants,
+        all_expenses,
+        all_splits,
+        my_relations,
+        my_history,
+    ) = await sync_to_async(_load_trip_data)(trip, my_id)
 
     owner_participant = next(
         (p for p in all_participants if p.user_id == trip.trip_owner_id), None
     )
     owner_participant_id = owner_participant.participant_id if owner_participant else None
 
-    all_expenses = await sync_to_async(
-        lambda: list(
-            Expense.objects.filter(trip=trip)
-            .select_related("payer")
-            .order_by("created_at")
-        )
-    )()
-
-    all_splits = await sync_to_async(
-        lambda: list(
-            Split.objects.filter(expense__trip=trip)
-            .select_related("expense", "participant")
-        )
-    )()
-
-    # Load ParticipantRelation records for my relations
-    my_relations = await sync_to_async(
-        lambda: list(
-            ParticipantRelation.objects.filter(trip=trip).filter(
-                models_q_participant_a_or_b(my_id)
-            )
-        )
-    )()
-
-    # Load settlement history only for my relations (single query)
-    my_history = await sync_to_async(
-        lambda: list(
-            SettlementHistory.objects.filter(trip=trip)
-            .filter(models_q_participant_a_or_b(my_id))
-            .select_related("actor_participant")
-            .order_by("-created_at")
-        )
-    )()
-
     # Group history by ordered pair (a_id, b_id) for efficient lookup
     history_by_pair: dict[tuple[int, int], list] = defaultdict(list)
     for record in my_history:
         pair = (record.participant_a_id, record.participant_b_id)
         history_by_pair[pair].append(record)
 
-    splits_by_expense: dict[int, list] = defaultdict(list)
-    for s in all_splits:
-        splits_by_expense[s.expense_id].append(s)
-
-    participant_map = {p.participant_id: p for p in all_participants}
-    expense_map = {e.expense_id: e.title for e in all_expenses}
+    splits_by_expense: dict[int, list] = {
+        expense_id: list(group)
+        for expense_id, group in groupby(all_splits, key=itemgetter("expense_id"))
+    }
 
-    total_expenses = float(sum(e.amount_in_trip_currency for e in all_expenses) or 0)
+    nickname_by_id = {p.participant_id: p.nickname for p in all_participants}
 
-    category_totals: dict[int, Decimal] = defaultdict(lambda: ZERO)
+    # Expense rows are loaded for the payload anyway, so the per-expense maps
+    # and the category totals come from one pass instead of extra aggregates.
+    expense_map: dict[int, str] = {}
+    expense_currency_by_id: dict[int, str] = {}
+    category_totals: dict[int, Decimal] = defaultdict(Decimal)
     for e in all_expenses:
+        expense_map[e.expense_id] = e.title
+        expense_currency_by_id[e.expense_id] = e.expense_currency
         category_totals[e.category] += e.amount_in_trip_currency
 
+    total_expenses = float(sum(category_totals.values(), ZERO))
+
     categories = [
         {"category_id": cat_id, "total_amount": float(total)}
         for cat_id, total in category_totals.items()
     ]
 
-    my_cost = _compute_my_cost(all_splits, my_id, trip_currency)
-    expenses = _build_expenses(all_expenses, splits_by_expense, participant_map, trip_currency)
-    participants = _build_participants(all_participants, all_splits, trip, trip_currency)
+    costs_per_participant = _compute_costs_per_participant(all_splits, trip_currency)
+    my_cost = costs_per_participant.get(my_id) or _money_values(trip_currency, ZERO, trip_currency, ZERO)
+    expenses = _build_expenses(
+        all_expenses, splits_by_expense, nickname_by_id, expense_currency_by_id, trip_currency
+    )
+    participants = _build_participants(all_participants, costs_per_participant, trip, trip_currency)
 
     settlement = _build_settlement_from_relations(
-        my_id, my_relations, participant_map, history_by_pair, expense_map
+        my_id, my_relations, nickname_by_id, history_by_pair, expense_map
     )
 
     return {
@@ -199,135 +179,170 @@ async def get_trip_details(request: HttpRequest, trip_id: int) -> dict:
     }
 
 
+def _load_trip_data(trip: Trip, my_id: int) -> tuple[list, list, list, list, list]:
+    """
+    Read everything tripDetails needs inside one transaction, so splits,
+    expenses, relations and history all come from the same point in time.
+    """
+    with transaction.atomic():
+        all_participants = list(Participant.objects.filter(trip=trip))
+        all_expenses = list(Expense.objects.filter(trip=trip).order_by("created_at"))
+        # Plain dicts: splits are the largest set and only these columns are read.
+        # The expense join is already there for the trip filter, so the
+        # currency rides along; participant FKs resolve through the maps below.
+        # Ordered by expense so they can be grouped without a dict per row.
+        all_splits = list(
+            Split.objects.filter(expense__trip=trip)
+            .order_by("expense_id", "id")
+            .values(*_SPLIT_FIELDS)
+        )
+        # ParticipantRelation records for my relations
+        my_relations = list(
+            ParticipantRelation.objects.filter(trip=trip).filter(
+                models_q_participant_a_or_b(my_id)
+            )
+        )
+        # Settlement history only for my relations
+        my_history = list(
+            SettlementHistory.objects.filter(trip=trip)
+            .filter(models_q_participant_a_or_b(my_id))
+            .order_by("-created_at")
+        )
+    return all_participants, all_expenses, all_splits, my_relations, my_history
+
+
 def models_q_participant_a_or_b(participant_id: int):
     """Build Q filter for ParticipantRelation where participant is A or B."""
     return Q(participant_a_id=participant_id) | Q(participant_b_id=participant_id)
 
 
 # ---------------------------------------------------------------------------
-# Helper: my cost
+# Helper: money value lists
 # ---------------------------------------------------------------------------
 
-def _compute_my_cost(
-    all_splits: list, my_id: int, trip_currency: str
-) -> list[dict]:
-    cost_by_currency: dict[str, Decimal] = defaultdict(lambda: ZERO)
-    total_in_trip_currency = ZERO
+def _money_values(trip_currency: str, trip_amount, currency: str, amount) -> list[dict]:
+    """Trip-currency entry, followed by a `currency` entry when it differs."""
+    main = {"is_main_currency": True, "currency": trip_currency, "amount": float(trip_amount)}
+    if currency == trip_currency:
+        return [main]
+    return [main, {"is_main_currency": False, "currency": currency, "amount": float(amount)}]
 
-    for split in all_splits:
-        if split.participant_id != my_id:
-            continue
-        expense_currency = split.expense.expense_currency.upper()
-        cost_by_currency[expense_currency] += split.amount_in_cost_currency
-        total_in_trip_currency += split.amount_in_trip_currency
 
-    result = [
+def _signed(entries: list[dict], sign: float) -> list[dict]:
+    return [
         {
-            "is_main_currency": True,
-            "currency": trip_currency,
-            "amount": float(total_in_trip_currency),
+            "is_main_currency": entry["is_main_currency"],
+            "currency": entry["currency"],
+            "amount": entry["amount"] * sign,
         }
+        for entry in entries
     ]
 
-    for curr, amount in cost_by_currency.items():
+
+# ---------------------------------------------------------------------------
+# Helper: cost per participant
+# ---------------------------------------------------------------------------
+
+def _compute_costs_per_participant(all_splits: list, trip_currency: str) -> dict[int, list[dict]]:
+    """
+    Money value list of each participant's share of the trip costs: the
+    trip-currency total first, then one entry per other expense currency.
+    Feeds both my_cost and every participant's total_expenses.
+    """
+    # Flat (participant_id, currency) keys: one hash lookup per split
+    cost_per_participant_currency: dict[tuple[int, str], Decimal] = {}
+    trip_total_per_participant: dict[int, Decimal] = {}
+
+    for split in all_splits:
+        pid = split["participant_id"]
+        key = (pid, split["expense__expense_currency"])
+        cost_per_participant_currency[key] = (
+            cost_per_participant_currency.get(key, ZERO) + split["amount_in_cost_currency"]
+        )
+        trip_total_per_participant[pid] = (
+            trip_total_per_participant.get(pid, ZERO) + split["amount_in_trip_currency"]
+        )
+
+    costs = {
+        pid: [{"is_main_currency": True, "currency": trip_currency, "amount": float(total)}]
+        for pid, total in trip_total_per_participant.items()
+    }
+    for (pid, curr), amount in cost_per_participant_currency.items():
         if curr != trip_currency:
-            result.append({
-                "is_main_currency": False,
-                "currency": curr,
-                "amount": float(amount),
-            })
+            costs[pid].append({"is_main_currency": False, "currency": curr, "amount": float(amount)})
 
-    return result
+    return costs
 
 
 # ---------------------------------------------------------------------------
 # Helper: build expenses
 # ---------------------------------------------------------------------------
 
+def _build_share(
+    split: dict, nickname_by_id: dict[int, str], expense_currency: str, trip_currency: str
+) -> dict:
+    # Converted once; reused by left_for_settlement and the UNSETTLED entry
+    left_trip = float(split["left_to_settlement_amount_in_trip_currency"])
+    left_cost = float(split["left_to_settlement_amount_in_cost_currency"])
+    return {
+        "participant_id": split["participant_id"],
+        "participant_nickname": nickname_by_id.get(split["participant_id"], "Unknown"),
+        "split_value": _money_values(
+            trip_currency, split["amount_in_trip_currency"],
+            expense_currency, split["amount_in_cost_currency"],
+        ),
+        "is_settlement": split["is_settlement"],
+        "left_for_settlement": _money_values(trip_currency, left_trip, expense_currency, left_cost),
+        # Settlement breakdown — read from JSON field, compute UNSETTLED
+        "settlement_breakdown": get_full_breakdown(split["settlement_breakdown"], left_cost, left_trip),
+    }
+
+
+def _build_expense(
+    expense: object,
+    splits: list,
+    nickname_by_id: dict[int, str],
+    expense_currency: str,
+    trip_currency: str,
+) -> dict:
+    amount_in_expense_currency = float(expense.amount_in_expenses_currency)
+    return {
+        "id": expense.expense_id,
+        "name": expense.title,
+        "description": expense.description,
+        "total_expense": _money_values(
+            trip_currency, expense.amount_in_trip_currency,
+            expense_currency, amount_in_expense_currency,
+        ),
+        "amount": amount_in_expense_currency,
+        "currency": expense_currency,
+        "date": expense.created_at.timestamp() * 1000,
+        "category_id": expense.category,
+        "payer_id": expense.payer_id,
+        "payer_nickname": nickname_by_id.get(expense.payer_id, "Unknown"),
+        "shared_with": [
+            _build_share(split, nickname_by_id, expense_currency, trip_currency)
+            for split in splits
+        ],
+    }
+
+
 def _build_expenses(
     all_expenses: list,
     splits_by_expense: dict,
-    participant_map: dict,
+    nickname_by_id: dict[int, str],
+    expense_currency_by_id: dict[int, str],
     trip_currency: str,
-) -> list[dict]:
-    expenses = []
-
+) -> Iterator[dict]:
+    """Lazily yields expense dicts; consumed once when building the GraphQL types."""
     for expense in all_expenses:
-        splits = splits_by_expense.get(expense.expense_id, [])
-        expense_currency = expense.expense_currency.upper()
-
-        total_expense = [
-            {
-                "is_main_currency": True,
-                "currency": trip_currency,
-                "amount": float(expense.amount_in_trip_currency),
-            }
-        ]
-        if expense_currency != trip_currency:
-            total_expense.append({
-                "is_main_currency": False,
-                "currency": expense_currency,
-                "amount": float(expense.amount_in_expenses_currency),
-            })
-
-        shared_with = []
-        for split in splits:
-            p = participant_map.get(split.participant_id)
-            split_values = [
-                {
-                    "is_main_currency": True,
-                    "currency": trip_currency,
-                    "amount": float(split.amount_in_trip_currency),
-                }
-            ]
-            left_for_settlement = [
-                {
-                    "is_main_currency": True,
-                    "currency": trip_currency,
-                    "amount": float(split.left_to_settlement_amount_in_trip_currency),
-                }
-            ]
-            if expense_currency != trip_currency:
-                split_values.append({
-                    "is_main_currency": False,
-                    "currency": expense_currency,
-                    "amount": float(split.amount_in_cost_currency),
-                })
-                left_for_settlement.append({
-                    "is_main_currency": False,
-                    "currency": expense_currency,
-                    "amount": float(split.left_to_settlement_amount_in_cost_currency),
-                })
-
-            # Settlement breakdown — read from JSON field, compute UNSETTLED
-            breakdown = get_full_breakdown(split)
-
-            shared_with.append({
-                "participant_id": split.participant_id,
-                "participant_nickname": p.nickname if p else "Unknown",
-                "split_value": split_values,
-                "is_settlement": split.is_settlement,
-                "left_for_settlement": left_for_settlement,
-                "settlement_breakdown": breakdown,
-            })
-
-        payer = participant_map.get(expense.payer_id)
-
-        expenses.append({
-            "id": expense.expense_id,
-            "name": expense.title,
-            "description": expense.description,
-            "total_expense": total_expense,
-            "amount": float(expense.amount_in_expenses_currency),
-            "currency": expense_currency,
-            "date": expense.created_at.timestamp() * 1000,
-            "category_id": expense.category,
-            "payer_id": expense.payer_id,
-            "payer_nickname": payer.nickname if payer else "Unknown",
-            "shared_with": shared_with,
-        })
-
-    return expenses
+        yield _build_expense(
+            expense,
+            splits_by_expense.get(expense.expense_id, ()),
+            nickname_by_id,
+            expense_currency_by_id[expense.expense_id],
+            trip_currency,
+        )
 
 
 # ---------------------------------------------------------------------------
@@ -336,140 +351,89 @@ def _build_expenses(
 
 def _build_participants(
     all_participants: list,
-    all_splits: list,
+    costs_per_participant: dict[int, list[dict]],
     trip: object,
     trip_currency: str,
-) -> list[dict]:
-    splits_per_participant: dict[int, dict[str, Decimal]] = defaultdict(lambda: defaultdict(lambda: ZERO))
-    trip_total_per_participant: dict[int, Decimal] = defaultdict(lambda: ZERO)
-
-    for split in all_splits:
-        pid = split.participant_id
-        expense_currency = split.expense.expense_currency.upper()
-        splits_per_participant[pid][expense_currency] += split.amount_in_cost_currency
-        trip_total_per_participant[pid] += split.amount_in_trip_currency
-
-    participants = []
+) -> Iterator[dict]:
+    """Lazily yields participant dicts; consumed once when building the GraphQL types."""
+    no_cost = _money_values(trip_currency, ZERO, trip_currency, ZERO)
+    owner_id = trip.trip_owner_id
     for p in all_participants:
-        pid = p.participant_id
-        currency_amounts = splits_per_participant.get(pid, {})
-        trip_total = trip_total_per_participant.get(pid, ZERO)
-
-        total_expenses = [
-            {
-                "is_main_currency": True,
-                "currency": trip_currency,
-                "amount": float(trip_total),
-            }
-        ]
-        for curr, amount in currency_amounts.items():
-            if curr != trip_currency:
-                total_expenses.append({
-                    "is_main_currency": False,
-                    "currency": curr,
-                    "amount": float(amount),
-                })
-
-        participants.append({
-            "id": pid,
+        yield {
+            "id": p.participant_id,
             "nickname": p.nickname,
-            "total_expenses": total_expenses,
-            "is_owner": p.user_id == trip.trip_owner_id,
+            "total_expenses": costs_per_participant.get(p.participant_id, no_cost),
+            "is_owner": p.user_id == owner_id,
             "is_placeholder": p.is_placeholder,
             "access_code": p.access_code,
             "is_active": not p.is_placeholder,
-        })
-
-    return participants
+        }
 
 
 # ---------------------------------------------------------------------------
 # Helper: build settlement from ParticipantRelation (read from DB)
 # ---------------------------------------------------------------------------
 
-def _build_settlement_from_relations(
+def _build_relation(
     my_id: int,
-    my_relations: list,
-    participant_map: dict,
+    rel: object,
+    nickname_by_id: dict[int, str],
     history_by_pair: dict[tuple[int, int], list],
     expense_map: dict[int, str],
 ) -> dict:
-    relations = []
-
-    for rel in my_relations:
-        if rel.participant_a_id == my_id:
-            other_id = rel.participant_b_id
-            sign = 1.0
-        else:
-            other_id = rel.participant_a_id
-            sign = -1.0
-
-        other_p = participant_map.get(other_id)
-
-        left_for_settled = [
-            {
-                "is_main_currency": entry["is_main_currency"],
-                "currency": entry["currency"],
-                "amount": entry["amount"] * sign,
-            }
-            for entry in rel.left_for_settled
-        ]
-
-        all_related_amount = [
-            {
-                "is_main_currency": entry["is_main_currency"],
-                "currency": entry["currency"],
-                "amount": entry["amount"] * sign,
-            }
-            for entry in rel.all_related_amount
-        ]
+    if rel.participant_a_id == my_id:
+        other_id = rel.participant_b_id
+        sign = 1.0
+    else:
+        other_id = rel.participant_a_id
+        sign = -1.0
+
+    prepayment_details = rel.prepayment_details or {"amount_left": [], "history": []}
+
+    # Settlement history for this specific relation
+    pair = (
+        min(my_id, other_id),
+        max(my_id, other_id),
+    )
 
-        prepayment_details = rel.prepayment_details or {"amount_left": [], "history": []}
+    return {
+        "related_id": other_id,
+        "related_name": nickname_by_id.get(other_id, "Unknown"),
+        "left_for_settled": _signed(rel.left_for_settled, sign),
+        "all_related_amount": _signed(rel.all_related_amount, sign),
+        "prepayment": {
+            "amount_left": _signed(prepayment_details.get("amount_left", []), sign),
+            "history": [
+                {
+                    "date": h["date"],
+                    "values": {
+                        "is_main_currency": h["values"]["is_main_currency"],
+                        "currency": h["values"]["currency"],
+                        "amount": h["values"]["amount"] * sign,
+                    },
+                }
+                for h in prepayment_details.get("history", [])
+            ],
+        },
+        "settlement_history": _build_relation_settlement_history(
+            my_id, history_by_pair.get(pair, []), nickname_by_id, expense_map
+        ),
+    }
 
-        amount_left = [
-            {
-                "is_main_currency": entry["is_main_currency"],
-                "currency": entry["currency"],
-                "amount": entry["amount"] * sign,
-            }
-            for entry in prepayment_details.get("amount_left", [])
-        ]
 
-        history = [
-            {
-                "date": h["date"],
-                "values": {
-                    "is_main_currency": h["values"]["is_main_currency"],
-                    "currency": h["values"]["currency"],
-                    "amount": h["values"]["amount"] * sign,
-                },
-            }
-            for h in prepayment_details.get("history", [])
+def _build_settlement_from_relations(
+    my_id: int,
+    my_relations: list,
+    nickname_by_id: dict[int, str],
+    history_by_pair: dict[tuple[int, int], list],
+    expense_map: dict[int, str],
+) -> dict:
+    return {
+        "relations": [
+            _build_relation(my_id, rel, nickname_by_id, history_by_pair, expense_map)
+            for rel in my_relations
         ]
-
-        # Settlement history for this specific relation
-        pair = (
-            min(my_id, other_id),
-            max(my_id, other_id),
-        )
-        pair_history = history_by_pair.get(pair, [])
-        settlement_history = _build_relation_settlement_history(
-            my_id, pair_history, participant_map, expense_map
-        )
-
-        relations.append({
-            "related_id": other_id,
-            "related_name": other_p.nickname if other_p else "Unknown",
-            "left_for_settled": left_for_settled,
-            "all_related_amount": all_related_amount,
-            "prepayment": {
-                "amount_left": amount_left,
-                "history": history,
-            },
-            "settlement_history": settlement_history,
-        })
-
-    return {"relations": relations}
+    }
 
 
 # ---------------------------------------------------------------------------
@@ -479,7 +443,7 @@ def _build_settlement_from_relations(
 def _build_relation_settlement_history(
     my_id: int,
     history_records: list,
-    participant_map: dict,
+    nickname_by_id: dict[int, str],
     expense_map: dict[int, str],
 ) -> list[dict]:
     """
@@ -500,8 +464,7 @@ def _build_relation_settlement_history(
 
         actor_nickname = None
         if record.actor_participant_id is not None:
-            actor_p = participant_map.get(record.actor_participant_id)
-            actor_nickname = actor_p.nickname if actor_p else "Unknown"
+            actor_nickname = nickname_by_id.get(record.actor_participant_id, "Unknown")
 
         related_names = [
             expense_map.get(eid, "Unknown")
@@ -1,9 +1,10 @@
+from inspect import isawaitable
 from strawberry.extensions import SchemaExtension
 from strawberry.types import Info
 from asgiref.sync import sync_to_async
 from TripApp.graphql.utils import get_request
 
-PUBLIC_OPERATIONS = {
+PUBLIC_OPERATIONS = frozenset({
     "loginUser",
     "login_user",
     "registerUser",
@@ -13,7 +14,7 @@ PUBLIC_OPERATIONS = {
     "session",
     "__schema",
     "__type",
-}
+})
 
 
 class RequireAuthenticationExtension(SchemaExtension):
@@ -22,20 +23,25 @@ class RequireAuthenticationExtension(SchemaExtension):
     to all queries/mutations except those listed in PUBLIC_OPERATIONS.
     """
 
-    async def resolve(self, _next, root, info: Info, *args, **kwargs):
-        parent_name = info.parent_type.name if info.parent_type else None
-        is_root = parent_name in ("Query", "Mutation", "Subscription")
+    def resolve(self, _next, root, info: Info, *args, **kwargs):
+        # Only root fields are guarded; nested fields sit under an
+        # already-checked root field, so they pass straight through and
+        # graphql-core awaits their result if needed.
+        if info.path.prev is None and info.field_name not in PUBLIC_OPERATIONS:
+            return self._resolve_protected(_next, root, info, *args, **kwargs)
+        return _next(root, info, *args, **kwargs)
 
-        if is_root:
-            field_name = info.field_name
-
-            if field_name not in PUBLIC_OPERATIONS:
-                request = get_request(info)
-                is_auth = await sync_to_async(lambda: request.user.is_authenticated)()
-                if not is_auth:
-                    raise PermissionError("Authentication required.")
+    async def _resolve_protected(self, _next, root, info: Info, *args, **kwargs):
+        request = get_request(info)
+        # Resolved once per request; further root fields reuse the result
+        is_auth = getattr(request, "_is_auth_cached", None)
+        if is_auth is None:
+            is_auth = await sync_to_async(lambda: request.user.is_authenticated)()
+            request._is_auth_cached = is_auth
+        if not is_auth:
+            raise PermissionError("Authentication required.")
 
         result = _next(root, info, *args, **kwargs)
-        if hasattr(result, "__await__"):
+        if isawaitable(result):
             return await result
-        return result
\ No newline at end of file
+        return result
@@ -0,0 +1,23 @@
+from django.db import migrations
+from django.db.models.functions import Upper
+
+
+def uppercase_currencies(apps, schema_editor):
+    Trip = apps.get_model('TripApp', 'Trip')
+    Expense = apps.get_model('TripApp', 'Expense')
+    Prepayment = apps.get_model('TripApp', 'Prepayment')
+
+    Trip.objects.update(default_currency=Upper('default_currency'))
+    Expense.objects.update(expense_currency=Upper('expense_currency'))
+    Prepayment.objects.update(currency=Upper('currency'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('TripApp', '0006_split_settlement_breakdown'),
+    ]
+
+    operations = [
+        migrations.RunPython(uppercase_currencies, migrations.RunPython.noop),
+    ]
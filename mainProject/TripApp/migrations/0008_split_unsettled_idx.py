@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('TripApp', '0007_uppercase_currencies'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='split',
+            index=models.Index(
+                condition=models.Q(is_settlement=False),
+                fields=['participant', 'expense'],
+                name='split_unsettled_idx',
+            ),
+        ),
+    ]
@@ -12,6 +12,11 @@ class Trip(models.Model):
     end_date = models.DateTimeField()
     default_currency = models.CharField(max_length=5)
 
+    def save(self, *args, **kwargs):
+        # Currencies are stored upper-cased so readers can compare them as-is
+        self.default_currency = self.default_currency.upper()
+        super().save(*args, **kwargs)
+
 
 class Participant(models.Model):
     access_code = models.CharField(max_length=8, db_index=True, null=True, blank=True)
@@ -49,6 +54,10 @@ class Expense(models.Model):
     rate = models.DecimalField(max_digits=12, decimal_places=6)
     payer = models.ForeignKey(Participant, on_delete=models.CASCADE, related_name="paid_expenses")
 
+    def save(self, *args, **kwargs):
+        self.expense_currency = self.expense_currency.upper()
+        super().save(*args, **kwargs)
+
 
 class Split(models.Model):
     participant = models.ForeignKey(Participant, on_delete=models.CASCADE, related_name="splits")
@@ -60,6 +69,16 @@ class Split(models.Model):
     left_to_settlement_amount_in_trip_currency = models.DecimalField(max_digits=10, decimal_places=2)
     settlement_breakdown = models.JSONField(default=list)
 
+    class Meta:
+        indexes = [
+            # Reconciliation only ever scans unsettled splits
+            models.Index(
+                fields=["participant", "expense"],
+                condition=Q(is_settlement=False),
+                name="split_unsettled_idx",
+            ),
+        ]
+
 
 class Prepayment(models.Model):
     trip = models.ForeignKey(Trip, on_delete=models.CASCADE)
@@ -71,6 +90,10 @@ class Prepayment(models.Model):
     rate = models.DecimalField(max_digits=12, decimal_places=6, default=1)
     created_date = models.DateTimeField(auto_now_add=True)
 
+    def save(self, *args, **kwargs):
+        self.currency = self.currency.upper()
+        super().save(*args, **kwargs)
+
 
 class ParticipantRelation(models.Model):
     """
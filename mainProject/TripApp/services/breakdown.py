@@ -64,14 +64,12 @@ def set_self_breakdown(split) -> None:
     }]
 
 
-def compute_unsettled_entry(split) -> dict | None:
+def compute_unsettled_entry(left_cost: float, left_trip: float) -> dict | None:
     """
-    Compute the UNSETTLED portion at read time.
+    Compute the UNSETTLED portion at read time from a split's remaining
+    amounts (already converted to float by the caller).
     Returns a dict entry or None if fully settled.
     """
-    left_cost = float(split.left_to_settlement_amount_in_cost_currency)
-    left_trip = float(split.left_to_settlement_amount_in_trip_currency)
-
     if left_cost > 0.005 or left_trip > 0.005:
         return {
             "type": "UNSETTLED",
@@ -81,15 +79,18 @@ def compute_unsettled_entry(split) -> dict | None:
     return None
 
 
-def get_full_breakdown(split) -> list[dict]:
+def get_full_breakdown(
+    settlement_breakdown: list | None, left_cost: float, left_trip: float
+) -> list[dict]:
     """
     Return the full breakdown including UNSETTLED (computed).
-    Used by the query layer.
+    Used by the query layer, which passes the split's stored breakdown
+    and its remaining amounts as floats.
     """
-    breakdown = list(split.settlement_breakdown or [])
+    breakdown = list(settlement_breakdown or [])
 
-    unsettled = compute_unsettled_entry(split)
+    unsettled = compute_unsettled_entry(left_cost, left_trip)
     if unsettled:
         breakdown.append(unsettled)
 
-    return breakdown
\ No newline at end of file
+    return breakdown
@@ -6,14 +6,45 @@ Channel group naming: "trip_{trip_id}"
 """
 
 import json
-from channels.layers import get_channel_layer
+from channels.layers import InMemoryChannelLayer, get_channel_layer
 from asgiref.sync import async_to_sync
 
 
+# Open trip_updates subscriptions per trip. Subscriptions register here when
+# they join the trip group, so mutations can skip building notifications
+# nobody would receive. The count is only trusted with the InMemoryChannelLayer,
+# where every subscriber lives in this process.
+_trip_subscribers: dict[int, int] = {}
+
+
 def _get_group_name(trip_id: int) -> str:
     return f"trip_{trip_id}"
 
 
+def register_subscriber(trip_id: int) -> None:
+    _trip_subscribers[trip_id] = _trip_subscribers.get(trip_id, 0) + 1
+
+
+def unregister_subscriber(trip_id: int) -> None:
+    remaining = _trip_subscribers.get(trip_id, 0) - 1
+    if remaining > 0:
+        _trip_subscribers[trip_id] = remaining
+    else:
+        _trip_subscribers.pop(trip_id, None)
+
+
+def has_subscribers(trip_id: int) -> bool:
+    """
+    True when a subscriber to the trip may exist.
+
+    Any layer other than the InMemoryChannelLayer can deliver to other
+    processes, so there the answer is always True.
+    """
+    if not isinstance(get_channel_layer(), InMemoryChannelLayer):
+        return True
+    return trip_id in _trip_subscribers
+
+
 async def broadcast_delta(trip_id: int, delta_payload: dict) -> None:
     """
     Send a delta payload to all subscribers of a trip.
@@ -34,4 +65,26 @@ async def broadcast_delta(trip_id: int, delta_payload: dict) -> None:
             "type": "trip.delta",
             "payload": delta_payload,
         },
+    )
+
+
+async def broadcast_deltas(trip_id: int, delta_payloads: list[dict]) -> None:
+    """
+    Send several delta payloads to all subscribers of a trip in one
+    group_send. Subscribers unpack the batch and filter each payload
+    exactly as if it had been sent through broadcast_delta.
+    """
+    if not delta_payloads:
+        return
+
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+
+    await channel_layer.group_send(
+        _get_group_name(trip_id),
+        {
+            "type": "trip.delta.batch",
+            "payloads": delta_payloads,
+        },
     )
\ No newline at end of file
@@ -77,6 +77,19 @@ async def build_settlement_changed_notification(
     )
 
 
+async def build_settlement_changed_notifications(
+    trip: Trip, actor_participant_id: int, target_participant_ids: set[int]
+) -> list[dict]:
+    """One SETTLEMENT_CHANGED payload per target, sharing a single nickname lookup."""
+    nickname = await _get_actor_nickname(trip, actor_participant_id)
+    return [
+        _build_notification(
+            trip, "SETTLEMENT_CHANGED", nickname, actor_participant_id, target_participant_id
+        )
+        for target_participant_id in target_participant_ids
+    ]
+
+
 async def build_participant_added_notification(trip: Trip, actor_participant_id: int) -> dict:
     nickname = await _get_actor_nickname(trip, actor_participant_id)
     return _build_notification(trip, "PARTICIPANT_ADDED", nickname, actor_participant_id)
@@ -3,18 +3,29 @@ Reconciliation engine — FIFO auto-settlement of prepayments against splits,
 and cross-settlement of opposing splits.
 
 Called from:
-  - addExpense  (after creating splits, try to apply existing prepayments + cross-settle)
+  - addExpense  (after creating splits, reconcile_splits: apply existing prepayments + cross-settle)
   - addPrepayment (after creating prepayment, try to apply against existing splits)
 """
 
 from decimal import Decimal
-from asgiref.sync import sync_to_async
 from TripApp.models import Prepayment, Split, Expense, Trip, SettlementHistory
 from TripApp.services.settlement_history import log_settlement
 from TripApp.services.breakdown import append_breakdown
 
 
 ZERO = Decimal("0.00")
+CENT = Decimal("0.01")
+
+# Rows fetched per round trip while streaming FIFO candidates
+_CHUNK_SIZE = 200
+
+# Split columns touched by reconciliation, flushed with one bulk_update
+_SPLIT_SETTLEMENT_FIELDS = [
+    "left_to_settlement_amount_in_trip_currency",
+    "left_to_settlement_amount_in_cost_currency",
+    "is_settlement",
+    "settlement_breakdown",
+]
 
 
 def _min_positive(*values: Decimal) -> Decimal:
@@ -34,33 +45,37 @@ async def apply_prepayments_to_split(split: Split, trip: Trip) -> None:
     Try to settle a single split using available prepayments (FIFO by created_date).
 
     Called after a new expense is created — for each split where participant != payer.
+    The split must come with its expense already loaded (built with expense=...
+    or fetched via select_related("expense")); it is read without a DB hit.
     """
     if split.left_to_settlement_amount_in_trip_currency <= ZERO:
         return
 
-    expense = await sync_to_async(lambda: split.expense)()
-    payer_id = await sync_to_async(lambda: expense.payer_id)()
-    participant_id = await sync_to_async(lambda: split.participant_id)()
-    expense_currency = expense.expense_currency.upper()
-    trip_currency = trip.default_currency.upper()
+    expense = split.expense
+    payer_id = expense.payer_id
+    participant_id = split.participant_id
+    # Currencies are stored upper-cased (see the model save() overrides)
+    expense_currency = expense.expense_currency
+    trip_currency = trip.default_currency
     rate = expense.rate
-
-    prepayments = await sync_to_async(
-        lambda: list(
-            Prepayment.objects.filter(
-                trip=trip,
-                from_participant_id=participant_id,
-                to_participant_id=payer_id,
-                amount_left__gt=ZERO,
-            ).order_by("created_date")
-        )
-    )()
-
-    for prepayment in prepayments:
+    # Per-expense, so decided once; division (not a precomputed 1/rate) is
+    # kept because it rounds exactly, e.g. 0.03 / 6 -> 0.00 but 0.03 * (1/6) -> 0.01
+    has_rate = bool(rate)
+
+    prepayments = Prepayment.objects.filter(
+        trip=trip,
+        from_participant_id=participant_id,
+        to_participant_id=payer_id,
+        amount_left__gt=ZERO,
+    ).order_by("created_date")
+
+    touched_prepayments = []
+    # Streamed in chunks; the loop usually stops long before the last row
+    async for prepayment in prepayments.aiterator(chunk_size=_CHUNK_SIZE):
         if split.left_to_settlement_amount_in_trip_currency <= ZERO:
             break
 
-        prep_currency = prepayment.currency.upper()
+        prep_currency = prepayment.currency
         settled_cost = ZERO
         settled_trip = ZERO
         breakdown_cost = ZERO
@@ -75,14 +90,15 @@ async def apply_prepayments_to_split(split: Split, trip: Trip) -> None:
             prepayment.amount_left -= settleable_trip
             split.left_to_settlement_amount_in_trip_currency -= settleable_trip
 
-            if rate and rate != ZERO:
-                settleable_cost = (settleable_trip / rate).quantize(Decimal("0.01"))
+            if has_rate:
+                settleable_cost = (settleable_trip / rate).quantize(CENT)
             else:
                 settleable_cost = settleable_trip
 
-            split.left_to_settlement_amount_in_cost_currency = max(
-                ZERO,
-                split.left_to_settlement_amount_in_cost_currency - settleable_cost,
+            split.left_to_settlement_amount_in_cost_currency = (
+                split.left_to_settlement_amount_in_cost_currency - settleable_cost
+                if split.left_to_settlement_amount_in_cost_currency > settleable_cost
+                else ZERO
             )
 
             settled_cost = settleable_trip  # in trip currency
@@ -90,7 +106,8 @@ async def apply_prepayments_to_split(split: Split, trip: Trip) -> None:
             breakdown_cost = settleable_cost
             breakdown_trip = settleable_trip
 
-        elif prep_currency == expense_currency and expense_currency != trip_currency:
+        elif prep_currency == expense_currency:
+            # prep_currency != trip_currency here, so the expense is foreign too
             settleable_cost = _min_positive(
                 prepayment.amount_left,
                 split.left_to_settlement_amount_in_cost_currency,
@@ -99,10 +116,11 @@ async def apply_prepayments_to_split(split: Split, trip: Trip) -> None:
             prepayment.amount_left -= settleable_cost
             split.left_to_settlement_amount_in_cost_currency -= settleable_cost
 
-            settleable_trip = (settleable_cost * rate).quantize(Decimal("0.01"))
-            split.left_to_settlement_amount_in_trip_currency = max(
-                ZERO,
-                split.left_to_settlement_amount_in_trip_currency - settleable_trip,
+            settleable_trip = (settleable_cost * rate).quantize(CENT)
+            split.left_to_settlement_amount_in_trip_currency = (
+                split.left_to_settlement_amount_in_trip_currency - settleable_trip
+                if split.left_to_settlement_amount_in_trip_currency > settleable_trip
+                else ZERO
             )
 
             settled_cost = settleable_cost
@@ -116,7 +134,7 @@ async def apply_prepayments_to_split(split: Split, trip: Trip) -> None:
         # Append breakdown entry
         append_breakdown(split, "AUTO_PREPAYMENT", breakdown_cost, breakdown_trip)
 
-        await sync_to_async(prepayment.save)()
+        touched_prepayments.append(prepayment)
 
         # Log auto-prepayment settlement
         if settled_trip > ZERO:
@@ -132,8 +150,11 @@ async def apply_prepayments_to_split(split: Split, trip: Trip) -> None:
                 actor_participant_id=None,
             )
 
+    if touched_prepayments:
+        await Prepayment.objects.abulk_update(touched_prepayments, ["amount_left"])
+
     _update_is_settlement(split)
-    await sync_to_async(split.save)()
+    await split.asave(update_fields=_SPLIT_SETTLEMENT_FIELDS)
 
 
 async def apply_prepayment_to_splits(prepayment: Prepayment, trip: Trip) -> None:
@@ -145,11 +166,14 @@ async def apply_prepayment_to_splits(prepayment: Prepayment, trip: Trip) -> None
     if prepayment.amount_left <= ZERO:
         return
 
-    prep_currency = prepayment.currency.upper()
-    trip_currency = trip.default_currency.upper()
+    prep_currency = prepayment.currency
+    trip_currency = trip.default_currency
+    # Decided once: the queryset below only yields splits in prep_currency
+    # when it is not the trip currency, so no per-split currency check is needed.
+    in_trip_currency = prep_currency == trip_currency
 
-    from_id = await sync_to_async(lambda: prepayment.from_participant_id)()
-    to_id = await sync_to_async(lambda: prepayment.to_participant_id)()
+    from_id = prepayment.from_participant_id
+    to_id = prepayment.to_participant_id
 
     base_qs = Split.objects.filter(
         participant_id=from_id,
@@ -159,24 +183,22 @@ async def apply_prepayment_to_splits(prepayment: Prepayment, trip: Trip) -> None
         left_to_settlement_amount_in_trip_currency__gt=ZERO,
     ).select_related("expense").order_by("expense__created_at")
 
-    if prep_currency != trip_currency:
-        base_qs = base_qs.filter(expense__expense_currency__iexact=prep_currency)
-
-    splits = await sync_to_async(lambda: list(base_qs))()
+    if not in_trip_currency:
+        base_qs = base_qs.filter(expense__expense_currency=prep_currency)
 
-    for split in splits:
+    touched_splits = []
+    async for split in base_qs.aiterator(chunk_size=_CHUNK_SIZE):
         if prepayment.amount_left <= ZERO:
             break
 
         expense = split.expense
-        expense_currency = expense.expense_currency.upper()
         rate = expense.rate
         settled_cost = ZERO
         settled_trip = ZERO
         breakdown_cost = ZERO
         breakdown_trip = ZERO
 
-        if prep_currency == trip_currency:
+        if in_trip_currency:
             settleable_trip = _min_positive(
                 prepayment.amount_left,
                 split.left_to_settlement_amount_in_trip_currency,
@@ -186,13 +208,14 @@ async def apply_prepayment_to_splits(prepayment: Prepayment, trip: Trip) -> None
             split.left_to_settlement_amount_in_trip_currency -= settleable_trip
 
             if rate and rate != ZERO:
-                settleable_cost = (settleable_trip / rate).quantize(Decimal("0.01"))
+                settleable_cost = (settleable_trip / rate).quantize(CENT)
             else:
                 settleable_cost = settleable_trip
 
-            split.left_to_settlement_amount_in_cost_currency = max(
-                ZERO,
-                split.left_to_settlement_amount_in_cost_currency - settleable_cost,
+            split.left_to_settlement_amount_in_cost_currency = (
+                split.left_to_settlement_amount_in_cost_currency - settleable_cost
+                if split.left_to_settlement_amount_in_cost_currency > settleable_cost
+                else ZERO
             )
 
             settled_cost = settleable_trip
@@ -209,10 +232,11 @@ async def apply_prepayment_to_splits(prepayment: Prepayment, trip: Trip) -> None
             prepayment.amount_left -= settleable_cost
             split.left_to_settlement_amount_in_cost_currency -= settleable_cost
 
-            settleable_trip = (settleable_cost * rate).quantize(Decimal("0.01"))
-            split.left_to_settlement_amount_in_trip_currency = max(
-                ZERO,
-                split.left_to_settlement_amount_in_trip_currency - settleable_trip,
+            settleable_trip = (settleable_cost * rate).quantize(CENT)
+            split.left_to_settlement_amount_in_trip_currency = (
+                split.left_to_settlement_amount_in_trip_currency - settleable_trip
+                if split.left_to_settlement_amount_in_trip_currency > settleable_trip
+                else ZERO
             )
 
             settled_cost = settleable_cost
@@ -224,7 +248,7 @@ async def apply_prepayment_to_splits(prepayment: Prepayment, trip: Trip) -> None
         append_breakdown(split, "AUTO_PREPAYMENT", breakdown_cost, breakdown_trip)
 
         _update_is_settlement(split)
-        await sync_to_async(split.save)()
+        touched_splits.append(split)
 
         # Log auto-prepayment settlement
         if settled_trip > ZERO:
@@ -240,7 +264,9 @@ async def apply_prepayment_to_splits(prepayment: Prepayment, trip: Trip) -> None
                 actor_participant_id=None,
             )
 
-    await sync_to_async(prepayment.save)()
+    if touched_splits:
+        await Split.objects.abulk_update(touched_splits, _SPLIT_SETTLEMENT_FIELDS)
+    await prepayment.asave(update_fields=["amount_left"])
 
 
 async def cross_settle_split(split: Split, trip: Trip) -> None:
@@ -248,16 +274,19 @@ async def cross_settle_split(split: Split, trip: Trip) -> None:
     Cross-settle a new split against existing opposing splits (FIFO by expense created_at).
 
     Called after a new expense is created — for each split where participant != payer.
+    Like apply_prepayments_to_split, expects the split's expense to be preloaded.
     """
     if split.left_to_settlement_amount_in_trip_currency <= ZERO:
         return
 
-    expense = await sync_to_async(lambda: split.expense)()
-    payer_id = await sync_to_async(lambda: expense.payer_id)()
-    participant_id = await sync_to_async(lambda: split.participant_id)()
-    expense_currency = expense.expense_currency.upper()
-    trip_currency = trip.default_currency.upper()
+    expense = split.expense
+    payer_id = expense.payer_id
+    participant_id = split.participant_id
+    expense_currency = expense.expense_currency
+    trip_currency = trip.default_currency
+    in_trip_currency = expense_currency == trip_currency
     new_rate = expense.rate
+    has_new_rate = bool(new_rate)
 
     base_qs = Split.objects.filter(
         participant_id=payer_id,
@@ -267,14 +296,11 @@ async def cross_settle_split(split: Split, trip: Trip) -> None:
         left_to_settlement_amount_in_trip_currency__gt=ZERO,
     ).select_related("expense").order_by("expense__created_at")
 
-    if expense_currency == trip_currency:
-        base_qs = base_qs.filter(expense__expense_currency__iexact=trip_currency)
-    else:
-        base_qs = base_qs.filter(expense__expense_currency__iexact=expense_currency)
-
-    opposing_splits = await sync_to_async(lambda: list(base_qs))()
+    # Opposing splits must share the new split's currency (trip or foreign alike)
+    base_qs = base_qs.filter(expense__expense_currency=expense_currency)
 
-    for opposing in opposing_splits:
+    touched_opposing = []
+    async for opposing in base_qs.aiterator(chunk_size=_CHUNK_SIZE):
         if split.left_to_settlement_amount_in_trip_currency <= ZERO:
             break
 
@@ -289,30 +315,32 @@ async def cross_settle_split(split: Split, trip: Trip) -> None:
         opp_breakdown_cost = ZERO
         opp_breakdown_trip = ZERO
 
-        if expense_currency == trip_currency:
+        if in_trip_currency:
             settleable_trip = _min_positive(
                 split.left_to_settlement_amount_in_trip_currency,
                 opposing.left_to_settlement_amount_in_trip_currency,
             )
 
             split.left_to_settlement_amount_in_trip_currency -= settleable_trip
-            if new_rate and new_rate != ZERO:
-                settleable_new_cost = (settleable_trip / new_rate).quantize(Decimal("0.01"))
+            if has_new_rate:
+                settleable_new_cost = (settleable_trip / new_rate).quantize(CENT)
             else:
                 settleable_new_cost = settleable_trip
-            split.left_to_settlement_amount_in_cost_currency = max(
-                ZERO,
-                split.left_to_settlement_amount_in_cost_currency - settleable_new_cost,
+            split.left_to_settlement_amount_in_cost_currency = (
+                split.left_to_settlement_amount_in_cost_currency - settleable_new_cost
+                if split.left_to_settlement_amount_in_cost_currency > settleable_new_cost
+                else ZERO
             )
 
             opposing.left_to_settlement_amount_in_trip_currency -= settleable_trip
             if opposing_rate and opposing_rate != ZERO:
-                settleable_opp_cost = (settleable_trip / opposing_rate).quantize(Decimal("0.01"))
+                settleable_opp_cost = (settleable_trip / opposing_rate).quantize(CENT)
             else:
                 settleable_opp_cost = settleable_trip
-            opposing.left_to_settlement_amount_in_cost_currency = max(
-                ZERO,
-                opposing.left_to_settlement_amount_in_cost_currency - settleable_opp_cost,
+            opposing.left_to_settlement_amount_in_cost_currency = (
+                opposing.left_to_settlement_amount_in_cost_currency - settleable_opp_cost
+                if opposing.left_to_settlement_amount_in_cost_currency > settleable_opp_cost
+                else ZERO
             )
 
             settled_cost = settleable_trip
@@ -329,17 +357,19 @@ async def cross_settle_split(split: Split, trip: Trip) -> None:
             )
 
             split.left_to_settlement_amount_in_cost_currency -= settleable_cost
-            settleable_new_trip = (settleable_cost * new_rate).quantize(Decimal("0.01"))
-            split.left_to_settlement_amount_in_trip_currency = max(
-                ZERO,
-                split.left_to_settlement_amount_in_trip_currency - settleable_new_trip,
+            settleable_new_trip = (settleable_cost * new_rate).quantize(CENT)
+            split.left_to_settlement_amount_in_trip_currency = (
+                split.left_to_settlement_amount_in_trip_currency - settleable_new_trip
+                if split.left_to_settlement_amount_in_trip_currency > settleable_new_trip
+                else ZERO
             )
 
             opposing.left_to_settlement_amount_in_cost_currency -= settleable_cost
-            settleable_opp_trip = (settleable_cost * opposing_rate).quantize(Decimal("0.01"))
-            opposing.left_to_settlement_amount_in_trip_currency = max(
-                ZERO,
-                opposing.left_to_settlement_amount_in_trip_currency - settleable_opp_trip,
+            settleable_opp_trip = (settleable_cost * opposing_rate).quantize(CENT)
+            opposing.left_to_settlement_amount_in_trip_currency = (
+                opposing.left_to_settlement_amount_in_trip_currency - settleable_opp_trip
+                if opposing.left_to_settlement_amount_in_trip_currency > settleable_opp_trip
+                else ZERO
             )
 
             settled_cost = settleable_cost
@@ -354,7 +384,7 @@ async def cross_settle_split(split: Split, trip: Trip) -> None:
         append_breakdown(opposing, "AUTO_CROSS_SETTLE", opp_breakdown_cost, opp_breakdown_trip)
 
         _update_is_settlement(opposing)
-        await sync_to_async(opposing.save)()
+        touched_opposing.append(opposing)
 
         # Log auto cross-settlement
         if settled_trip > ZERO:
@@ -372,5 +402,20 @@ async def cross_settle_split(split: Split, trip: Trip) -> None:
                 actor_participant_id=None,
             )
 
+    if touched_opposing:
+        await Split.objects.abulk_update(touched_opposing, _SPLIT_SETTLEMENT_FIELDS)
+
     _update_is_settlement(split)
-    await sync_to_async(split.save)()
\ No newline at end of file
+    await split.asave(update_fields=_SPLIT_SETTLEMENT_FIELDS)
+
+
+async def reconcile_splits(splits: list[Split], trip: Trip) -> None:
+    """
+    Apply prepayments and cross-settle the new splits of one expense, in order.
+
+    Kept sequential: every DB call shares the one thread-sensitive connection,
+    and a failure must stop all further writes for the mutation.
+    """
+    for split in splits:
+        await apply_prepayments_to_split(split, trip)
+        await cross_settle_split(split, trip)
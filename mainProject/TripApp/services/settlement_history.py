@@ -5,7 +5,6 @@ Convention: participant_a.id < participant_b.id (same as ParticipantRelation).
 """
 
 from decimal import Decimal
-from asgiref.sync import sync_to_async
 from TripApp.models import Trip, Participant, SettlementHistory
 
 
@@ -32,7 +31,7 @@ async def log_settlement(
     """
     a_id, b_id = _ordered_pair(from_participant_id, to_participant_id)
 
-    await sync_to_async(SettlementHistory.objects.create)(
+    await SettlementHistory.objects.acreate(
         trip=trip,
         participant_a_id=a_id,
         participant_b_id=b_id,
@@ -1,6 +1,43 @@
-import os, django
+import hashlib
+import os
+import sys
+from importlib.metadata import version
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+APP_DIR = BASE_DIR / "TripApp"
+CACHE_DIR = Path.home() / ".cache" / "tripbe"
+
+
+def _sources_fingerprint() -> str:
+    """Hash of the GraphQL library versions and mtime/size of every schema source file."""
+    digest = hashlib.sha256()
+    # SDL printing can change between releases
+    for package in ("strawberry-graphql", "graphql-core"):
+        digest.update(f"{package}:{version(package)}\n".encode())
+    for path in sorted([*(APP_DIR / "graphql").rglob("*.py"), APP_DIR / "models.py"]):
+        stat = path.stat()
+        digest.update(f"{path.relative_to(APP_DIR)}:{stat.st_mtime_ns}:{stat.st_size}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+cached = CACHE_DIR / f"schema-{_sources_fingerprint()}.graphql"
+
+# Sources unchanged since the last export: print it without bootstrapping Django
+if cached.exists():
+    sys.stdout.write(cached.read_text(encoding="utf-8"))
+    sys.exit(0)
+
+import django
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mainProject.settings")
 django.setup()
 
 from TripApp.graphql.schema import schema
-print(schema.as_str())
\ No newline at end of file
+schema_str = schema.as_str()
+print(schema_str)
+
+# Keep only the export for the current sources
+CACHE_DIR.mkdir(parents=True, exist_ok=True)
+for stale in CACHE_DIR.glob("schema-*.graphql"):
+    stale.unlink(missing_ok=True)
+cached.write_text(schema_str + "\n", encoding="utf-8")